@@ -1,12 +1,16 @@
-from typing import Dict, List, Optional, Union, Set
+from typing import Dict, FrozenSet, List, Optional, TextIO, Tuple, Union, Set
+import io
 import json
 import logging
 import re
-from collections import Counter
+import sys
 
 # Configure logging with a default setup
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Default pattern for valid codes: exactly four decimal digits
+_DEFAULT_CODE_PATTERN = r"^\d{4}$"
+
 class CarrierCodesError(Exception):
     """Custom exception for CarrierCodes-related errors."""
     pass
@@ -15,12 +19,29 @@ class CarrierCodes:
     """A class to manage and analyze carrier codes provided as a dictionary.
 
     Attributes:
-        raw_codes (Dict[str, Union[str, List[str]]]): Input dictionary mapping carriers to codes.
+        raw_codes (Dict[str, Union[str, List[str]]]): Input dictionary mapping uppercased carriers to codes.
         _organized_codes (Dict[str, List[str]]): Cached organized codes for efficiency.
-        _all_codes (Set[str]): Cached set of all codes for fast lookup.
+        _all_codes (FrozenSet[str]): Cached immutable set of all codes for fast lookup.
+        _code_counter (Dict[str, int]): Cached occurrence count of each code.
+        _code_to_carriers (Dict[str, List[str]]): Cached reverse index of codes to carriers.
+        _display_cache (Dict[Tuple[str, Optional[int]], str]): Cached display() output per format and indent.
+        _counts_per_carrier (Dict[str, int]): Cached number of codes per carrier.
+        _empty_carriers (List[str]): Cached sorted list of carriers with no codes.
     """
 
-    def __init__(self, raw_codes: Dict[str, Union[str, List[str]]], code_pattern: str = r"^\d{4}$") -> None:
+    __slots__ = (
+        "raw_codes",
+        "_code_pattern",
+        "_organized_codes",
+        "_all_codes",
+        "_code_counter",
+        "_code_to_carriers",
+        "_display_cache",
+        "_counts_per_carrier",
+        "_empty_carriers",
+    )
+
+    def __init__(self, raw_codes: Dict[str, Union[str, List[str]]], code_pattern: str = _DEFAULT_CODE_PATTERN) -> None:
         """Initialize the CarrierCodes instance.
 
         Args:
@@ -37,7 +58,12 @@ class CarrierCodes:
         self._code_pattern = re.compile(code_pattern)
         self.raw_codes = self._validate_raw_codes(raw_codes)
         self._organized_codes: Optional[Dict[str, List[str]]] = None
-        self._all_codes: Optional[Set[str]] = None
+        self._all_codes: Optional[FrozenSet[str]] = None
+        self._code_counter: Optional[Dict[str, int]] = None
+        self._code_to_carriers: Optional[Dict[str, List[str]]] = None
+        self._display_cache: Dict[Tuple[str, Optional[int]], str] = {}
+        self._counts_per_carrier: Optional[Dict[str, int]] = None
+        self._empty_carriers: Optional[List[str]] = None
         self._check_duplicate_codes()
 
     def _is_valid_input(self, raw_codes: any) -> bool:
@@ -58,7 +84,7 @@ class CarrierCodes:
             raw_codes: The raw input dictionary.
 
         Returns:
-            Dict[str, Union[str, List[str]]]: Validated raw codes.
+            Dict[str, Union[str, List[str]]]: Validated raw codes keyed by uppercased carrier names.
 
         Raises:
             CarrierCodesError: If carrier names or codes are invalid.
@@ -73,7 +99,7 @@ class CarrierCodes:
             if carrier_upper in seen_carriers:
                 raise CarrierCodesError(f"Duplicate carrier name (case-insensitive): {carrier}")
             seen_carriers.add(carrier_upper)
-            validated_codes[carrier] = codes
+            validated_codes[carrier_upper] = codes
 
         return validated_codes
 
@@ -83,30 +109,85 @@ class CarrierCodes:
         Returns:
             Dict[str, List[str]]: Organized codes with carriers as keys and code lists as values.
         """
-        if self._organized_codes is not None:
-            return self._organized_codes
-
-        self._organized_codes = {}
+        organized = self._organized_codes
+        if organized is not None:
+            return organized
+
+        organized = self._organized_codes = {}
+        match = self._code_pattern.match
+        # Interned so a code shared by several carriers is stored once
+        intern = sys.intern
+        # For the default pattern, len() + isdecimal() on a stripped token is
+        # equivalent to the regex and avoids the regex engine entirely
+        fixed_width = (self._code_pattern.pattern == _DEFAULT_CODE_PATTERN
+                       and self._code_pattern.flags == re.UNICODE)
         for carrier, codes in self.raw_codes.items():
             try:
                 if isinstance(codes, str):
-                    codes_array = [code.strip() for code in codes.split(",") if code.strip()]
+                    tokens = [code.strip() for code in codes.split(",")]
                 elif isinstance(codes, list):
-                    codes_array = [str(code).strip() for code in codes if str(code).strip()]
+                    tokens = (str(code).strip() for code in codes)
                 else:
                     logging.warning(f"Invalid codes for carrier {carrier}: Expected string or list.")
-                    codes_array = []
-
-                # Validate codes against the pattern
-                valid_codes = [code for code in codes_array if self._code_pattern.match(code)]
-                if len(valid_codes) < len(codes_array):
+                    tokens = ()
+
+                # Drop empty tokens and validate against the pattern in one pass
+                valid_codes = []
+                invalid_count = 0
+                for code in tokens:
+                    if not code:
+                        continue
+                    if (len(code) == 4 and code.isdecimal()) if fixed_width else match(code):
+                        valid_codes.append(intern(code))
+                    else:
+                        invalid_count += 1
+                if invalid_count:
                     logging.warning(f"Some codes for carrier {carrier} do not match pattern {self._code_pattern.pattern}")
-                self._organized_codes[carrier.upper()] = valid_codes
+                organized[carrier] = valid_codes
             except Exception as e:
                 logging.error(f"Error processing carrier {carrier}: {str(e)}")
-                self._organized_codes[carrier.upper()] = []
+                organized[carrier] = []
+
+        # Build the reverse index used for code -> carrier lookups
+        code_to_carriers = self._code_to_carriers = {}
+        for carrier, codes in organized.items():
+            for code in codes:
+                carriers = code_to_carriers.setdefault(code, [])
+                if not carriers or carriers[-1] != carrier:
+                    carriers.append(carrier)
+
+        self._counts_per_carrier = {carrier: len(codes) for carrier, codes in organized.items()}
+        self._empty_carriers = sorted([carrier for carrier, codes in organized.items() if not codes])
+
+        return organized
+
+    def _invalidate_caches(self) -> None:
+        """Drop every cached structure derived from raw_codes."""
+        self._organized_codes = None
+        self._all_codes = None
+        self._code_counter = None
+        self._code_to_carriers = None
+        self._display_cache.clear()
+        self._counts_per_carrier = None
+        self._empty_carriers = None
 
-        return self._organized_codes
+    def _counts(self) -> Dict[str, int]:
+        """Count occurrences of each code across all carriers.
+
+        Returns:
+            Dict[str, int]: Cached mapping of codes to their occurrence counts.
+        """
+        counts = self._code_counter
+        if counts is not None:
+            return counts
+
+        counts = {}
+        get = counts.get
+        for codes in self._organize().values():
+            for code in codes:
+                counts[code] = get(code, 0) + 1
+        self._code_counter = counts
+        return counts
 
     def _check_duplicate_codes(self) -> None:
         """Log warnings for duplicate codes during initialization."""
@@ -114,42 +195,77 @@ class CarrierCodes:
         if duplicates:
             logging.warning(f"Duplicate codes found: {duplicates}")
 
-    def display(self, format_type: str = "json", indent: int = 4) -> str:
-        """Generate a string representation of the organized codes.
+    def write_to(self, fp: TextIO, format_type: str = "json", indent: Optional[int] = 4) -> None:
+        """Write the organized codes to a text stream without building the full output first.
 
         Args:
+            fp: Writable text stream (e.g. sys.stdout or an open file).
             format_type: Output format ("json", "plain", or "csv").
-            indent: Indentation level for JSON output.
-
-        Returns:
-            str: Formatted string representation of the codes.
+            indent: Indentation level for JSON output (None for compact output).
         """
+        cached = self._display_cache.get((format_type, indent))
+        if cached is not None:
+            fp.write(cached)
+            return
+
         organized = self._organize()
+        write = fp.write
         if format_type == "json":
-            return json.dumps(organized, indent=indent)
+            separators = (",", ":") if indent is None else None
+            json.dump(organized, fp, indent=indent, separators=separators)
         elif format_type == "plain":
-            lines = [f"{carrier}: {', '.join(codes) if codes else 'No codes'}" for carrier, codes in organized.items()]
-            return "\n".join(lines)
+            separator = ""
+            for carrier, codes in organized.items():
+                write(f"{separator}{carrier}: {', '.join(codes) if codes else 'No codes'}")
+                separator = "\n"
         elif format_type == "csv":
-            lines = ["carrier,codes"]
+            write("carrier,codes")
             for carrier, codes in organized.items():
-                lines.append(f"{carrier},\"{','.join(codes)}\"")
-            return "\n".join(lines)
+                write(f"\n{carrier},\"{','.join(codes)}\"")
         else:
             logging.warning(f"Unsupported format type: {format_type}")
-            return ""
 
-    def get_all_codes(self) -> Set[str]:
-        """Retrieve all unique codes across all carriers.
+    def display(self, format_type: str = "json", indent: Optional[int] = 4) -> str:
+        """Generate a string representation of the organized codes.
+
+        Args:
+            format_type: Output format ("json", "plain", or "csv").
+            indent: Indentation level for JSON output (None for compact output).
 
         Returns:
-            Set[str]: A set of all codes.
+            str: Formatted string representation of the codes.
         """
-        if self._all_codes is not None:
-            return self._all_codes
+        key = (format_type, indent)
+        cached = self._display_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if format_type == "json":
+            # dumps() can use the C one-shot encoder, which dump() never does
+            separators = (",", ":") if indent is None else None
+            output = json.dumps(self._organize(), indent=indent, separators=separators)
+        else:
+            buffer = io.StringIO()
+            self.write_to(buffer, format_type=format_type, indent=indent)
+            output = buffer.getvalue()
+        # Unsupported formats write nothing; leave them uncached so they keep warning
+        if output:
+            self._display_cache[key] = output
+        return output
+
+    def get_all_codes(self) -> FrozenSet[str]:
+        """Retrieve all unique codes across all carriers.
+
+        The result is immutable, so it can be shared safely and combined with
+        other instances' codes using set operations (e.g. ``a.get_all_codes() & b.get_all_codes()``).
 
-        self._all_codes = set(code for codes in self._organize().values() for code in codes)
-        return self._all_codes
+        Returns:
+            FrozenSet[str]: A frozenset of all codes.
+        """
+        all_codes = self._all_codes
+        if all_codes is None:
+            all_codes = self._all_codes = frozenset(code for codes in self._organize().values() for code in codes)
+        return all_codes
 
     def get_codes_by_carrier(self, carrier_name: str) -> List[str]:
         """Retrieve codes for a specific carrier.
@@ -160,7 +276,7 @@ class CarrierCodes:
         Returns:
             List[str]: List of codes for the carrier, or empty list if not found.
         """
-        return self._organize().get(carrier_name.upper(), [])
+        return list(self._organize().get(carrier_name.upper(), []))
 
     def find_carriers_by_code(self, search_code: str) -> List[str]:
         """Find all carriers associated with a given code.
@@ -171,7 +287,27 @@ class CarrierCodes:
         Returns:
             List[str]: List of carrier names containing the code, or empty list if not found.
         """
-        return [carrier for carrier, codes in self._organize().items() if search_code in codes]
+        code_to_carriers = self._code_to_carriers
+        if code_to_carriers is None:
+            self._organize()
+            code_to_carriers = self._code_to_carriers
+        return list(code_to_carriers.get(search_code, []))
+
+    def find_carrier_by_code(self, search_code: str) -> Optional[str]:
+        """Find the first carrier associated with a given code.
+
+        Args:
+            search_code: The code to search for.
+
+        Returns:
+            Optional[str]: The first carrier name containing the code, or None if not found.
+        """
+        code_to_carriers = self._code_to_carriers
+        if code_to_carriers is None:
+            self._organize()
+            code_to_carriers = self._code_to_carriers
+        carriers = code_to_carriers.get(search_code)
+        return carriers[0] if carriers else None
 
     def count_codes_per_carrier(self) -> Dict[str, int]:
         """Count the number of codes per carrier.
@@ -179,7 +315,11 @@ class CarrierCodes:
         Returns:
             Dict[str, int]: Dictionary mapping carriers to their code counts.
         """
-        return {carrier: len(codes) for carrier, codes in self._organize().items()}
+        counts = self._counts_per_carrier
+        if counts is None:
+            self._organize()
+            counts = self._counts_per_carrier
+        return dict(counts)
 
     def has_duplicate_codes(self) -> bool:
         """Check if there are any duplicate codes across carriers.
@@ -187,8 +327,21 @@ class CarrierCodes:
         Returns:
             bool: True if duplicates exist, False otherwise.
         """
-        all_codes = self.get_all_codes()
-        return len(all_codes) != len(self._organize_codes(all_codes))
+        counts = self._code_counter
+        if counts is not None:
+            return any(count > 1 for count in counts.values())
+
+        # Cold cache: stop at the first repeat rather than counting every code
+        seen: Set[str] = set()
+        add = seen.add
+        total = 0
+        for codes in self._organize().values():
+            for code in codes:
+                total += 1
+                add(code)
+                if len(seen) != total:
+                    return True
+        return False
 
     def get_duplicate_codes(self) -> List[str]:
         """Retrieve codes that appear multiple times across carriers.
@@ -196,8 +349,7 @@ class CarrierCodes:
         Returns:
             List[str]: List of duplicate codes.
         """
-        code_counts = Counter(code for codes in self._organize().values() for code in codes)
-        return sorted([code for code, count in code_counts.items() if count > 1])
+        return sorted([code for code, count in self._counts().items() if count > 1])
 
     def get_unique_codes(self) -> List[str]:
         """Retrieve codes that appear only once across carriers.
@@ -205,8 +357,44 @@ class CarrierCodes:
         Returns:
             List[str]: List of unique codes.
         """
-        code_counts = Counter(code for codes in self._organize().values() for code in codes)
-        return sorted([code for code, count in code_counts.items() if count == 1])
+        return sorted([code for code, count in self._counts().items() if count == 1])
+
+    def _shared_code_set(self, carrier_a: str, carrier_b: str) -> Set[str]:
+        """Intersect the codes of two carriers.
+
+        Args:
+            carrier_a: The name of the first carrier (case-insensitive).
+            carrier_b: The name of the second carrier (case-insensitive).
+
+        Returns:
+            Set[str]: Codes held by both carriers.
+        """
+        organized = self._organize()
+        return set(organized.get(carrier_a.upper(), [])).intersection(organized.get(carrier_b.upper(), []))
+
+    def get_shared_codes(self, carrier_a: str, carrier_b: str) -> List[str]:
+        """Retrieve codes assigned to both of two carriers.
+
+        Args:
+            carrier_a: The name of the first carrier (case-insensitive).
+            carrier_b: The name of the second carrier (case-insensitive).
+
+        Returns:
+            List[str]: Sorted list of shared codes, or empty list if either carrier is not found.
+        """
+        return sorted(self._shared_code_set(carrier_a, carrier_b))
+
+    def count_shared_codes(self, carrier_a: str, carrier_b: str) -> int:
+        """Count codes assigned to both of two carriers.
+
+        Args:
+            carrier_a: The name of the first carrier (case-insensitive).
+            carrier_b: The name of the second carrier (case-insensitive).
+
+        Returns:
+            int: Number of shared codes, or 0 if either carrier is not found.
+        """
+        return len(self._shared_code_set(carrier_a, carrier_b))
 
     def carriers_with_no_codes(self) -> List[str]:
         """Identify carriers with no associated codes.
@@ -214,7 +402,11 @@ class CarrierCodes:
         Returns:
             List[str]: List of carrier names with no codes.
         """
-        return sorted([carrier for carrier, codes in self._organize().items() if not codes])
+        empty_carriers = self._empty_carriers
+        if empty_carriers is None:
+            self._organize()
+            empty_carriers = self._empty_carriers
+        return list(empty_carriers)
 
     def is_valid_code(self, code: str) -> bool:
         """Check if a code is valid (exists in any carrier's codes).
@@ -237,15 +429,14 @@ class CarrierCodes:
         Raises:
             CarrierCodesError: If the carrier already exists or is invalid.
         """
-        carrier_upper = carrier.upper()
-        if carrier_upper in self._organize():
-            raise CarrierCodesError(f"Carrier {carrier} already exists.")
         if not isinstance(carrier, str) or not carrier.strip():
             raise CarrierCodesError(f"Invalid carrier name: {carrier}")
+        carrier_upper = carrier.upper()
+        if carrier_upper in self.raw_codes:
+            raise CarrierCodesError(f"Carrier {carrier} already exists.")
         
-        self.raw_codes[carrier] = codes
-        self._organized_codes = None
-        self._all_codes = None
+        self.raw_codes[carrier_upper] = codes
+        self._invalidate_caches()
         self._check_duplicate_codes()
 
     def remove_carrier(self, carrier: str) -> None:
@@ -258,12 +449,11 @@ class CarrierCodes:
             CarrierCodesError: If the carrier does not exist.
         """
         carrier_upper = carrier.upper()
-        if carrier_upper not in self._organize():
+        if carrier_upper not in self.raw_codes:
             raise CarrierCodesError(f"Carrier {carrier} does not exist.")
         
-        del self.raw_codes[carrier]
-        self._organized_codes = None
-        self._all_codes = None
+        del self.raw_codes[carrier_upper]
+        self._invalidate_caches()
 
 
 # Example usage and basic tests
@@ -285,10 +475,12 @@ if __name__ == "__main__":
         print("\nAll codes:", sorted(carrier_codes.get_all_codes()))
         print("\nCodes for IRANCEEL:", carrier_codes.get_codes_by_carrier("iranceel"))
         print("\nCarriers for code '0903':", carrier_codes.find_carriers_by_code("0903"))
+        print("\nFirst carrier for code '0903':", carrier_codes.find_carrier_by_code("0903"))
         print("\nCount of codes per carrier:", carrier_codes.count_codes_per_carrier())
         print("\nContains duplicate codes:", carrier_codes.has_duplicate_codes())
         print("\nDuplicate codes:", carrier_codes.get_duplicate_codes())
         print("\nUnique codes:", carrier_codes.get_unique_codes())
+        print("\nCodes shared by MCI and IRANCEEL:", carrier_codes.get_shared_codes("MCI", "IRANCEEL"))
         print("\nCarriers with no codes:", carrier_codes.carriers_with_no_codes())
         print("\nIs code '0910' valid?:", carrier_codes.is_valid_code("0910"))
         print("\nIs code '0999' valid?:", carrier_codes.is_valid_code("0999"))